@@ -12,6 +12,9 @@ AVATAR_PATH = "./assets/textures/avatar.png"
 # Map generation settings
 DEFAULT_GRID_SIZE = 60
 ISLAND_RADIUS_FACTOR = 0.4  # Percentage of grid size
+COAST_NOISE_AMPLITUDE = 6.0  # How far (in tiles) the coastline wanders from the circle
+COAST_NOISE_OCTAVES = 4  # Layers of fractal noise shaping the coastline
+CLEANUP_PASSES = 1  # Isolated tile cleanup passes (smooth coastlines need few)
 LAKE_COUNT_RANGE = (1, 2)
 FOREST_COUNT_RANGE = (3, 5)
 ROCK_COUNT = 3
@@ -47,4 +50,12 @@ OBJECT_STATS = {
         "defense_bonus": 3,
         "attack_penalty": 1
     }
-}
\ No newline at end of file
+}
+
+# Rendering settings
+CACHE_TILE_SIZE = 512  # Pixel size of one cached background tile
+CACHE_MAX_TILES = 64  # Background tiles kept in memory before eviction
+
+# View settings
+ZOOM_STEP = 1.15  # 15% scale per scroll step
+ZOOM_INTERVAL_MS = 16  # Wheel events are coalesced into one zoom per frame
@@ -0,0 +1,148 @@
+"""
+Graphics scene that draws the terrain from a cache of pre-rendered tiles
+"""
+from collections import OrderedDict
+
+import numpy as np
+from PyQt6.QtWidgets import QGraphicsScene
+from PyQt6.QtGui import QPainter, QPixmap, QImage
+from PyQt6.QtCore import Qt
+
+from src.map.terrain import WATER, TERRAIN_NAMES
+from src.config import CACHE_TILE_SIZE, CACHE_MAX_TILES
+
+
+class TileCache:
+    """Least-recently-used cache of rendered background tiles"""
+
+    def __init__(self, render_tile, max_tiles=CACHE_MAX_TILES):
+        self.render_tile = render_tile
+        self.max_tiles = max_tiles
+        self.tiles = OrderedDict()
+
+    def get(self, tx, ty):
+        """Return the pixmap of tile (tx, ty), rendering it on a cache miss"""
+        key = (tx, ty)
+        pixmap = self.tiles.get(key)
+
+        if pixmap is not None:
+            # Mark as most recently used
+            self.tiles.move_to_end(key)
+            return pixmap
+
+        pixmap = self.render_tile(tx, ty)
+        self.tiles[key] = pixmap
+
+        # Evict the least recently used tile when over capacity
+        if len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+
+        return pixmap
+
+    def clear(self):
+        """Drop all cached tiles"""
+        self.tiles.clear()
+
+
+class MapScene(QGraphicsScene):
+    """Scene that paints the terrain grid as its background"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.grid = None
+        self.grid_size = 0
+        self.tile_size = 0
+        self.brushes = ()
+        self.atlas = None  # Pixels of one tile per terrain, indexed by type code
+        self.tile_cache = TileCache(self._render_tile)
+
+    def set_terrain(self, grid, tile_size, textures):
+        """Set the terrain grid to draw as the background"""
+        self.grid = grid
+        self.grid_size = len(grid)
+        self.tile_size = tile_size
+
+        # Terrain brushes indexed by type code, resolved once for all cells
+        self.brushes = tuple(textures[name] for name in TERRAIN_NAMES)
+
+        # Water is the scene background, so cached tiles only hold the land
+        self.setBackgroundBrush(self.brushes[WATER])
+
+        # Pack one tile of every terrain into a single atlas pixmap
+        self._build_atlas()
+
+        # Previously rendered tiles are stale now
+        self.tile_cache.clear()
+        self.invalidate(self.sceneRect(), QGraphicsScene.SceneLayer.BackgroundLayer)
+
+    def drawBackground(self, painter, rect):
+        """Draw the cached terrain tiles intersecting the exposed rect"""
+        # Fill the water background brush in one pass
+        super().drawBackground(painter, rect)
+
+        if self.grid is None:
+            return
+
+        # Range of cache tiles covering the exposed part of the map
+        map_size = self.grid_size * self.tile_size
+        first_x = max(0, int(rect.left()) // CACHE_TILE_SIZE)
+        first_y = max(0, int(rect.top()) // CACHE_TILE_SIZE)
+        last_x = min(int(rect.right()), map_size - 1) // CACHE_TILE_SIZE
+        last_y = min(int(rect.bottom()), map_size - 1) // CACHE_TILE_SIZE
+
+        for ty in range(first_y, last_y + 1):
+            for tx in range(first_x, last_x + 1):
+                painter.drawPixmap(tx * CACHE_TILE_SIZE, ty * CACHE_TILE_SIZE, self.tile_cache.get(tx, ty))
+
+    def _build_atlas(self):
+        """Paint one tile of each terrain side by side and keep the pixels as an array"""
+        ts = self.tile_size
+        count = len(self.brushes)
+        image = QImage(ts * count, ts, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(image)
+        for terrain, brush in enumerate(self.brushes):
+            # Anchor the texture at the slot corner
+            painter.setBrushOrigin(terrain * ts, 0)
+            painter.fillRect(terrain * ts, 0, ts, ts, brush)
+        painter.end()
+
+        # Split the rows of slots into one (ts, ts, 4) block per terrain
+        bits = image.constBits()
+        bits.setsize(image.sizeInBytes())
+        pixels = np.frombuffer(bits, dtype=np.uint8).reshape(ts, count, ts, 4)
+        self.atlas = pixels.transpose(1, 0, 2, 3).copy()
+
+        # Water shows through from the scene background, so its block stays transparent
+        self.atlas[WATER] = 0
+
+    def _render_tile(self, tx, ty):
+        """Render the terrain cells covered by one cache tile"""
+        # Scene position of the tile and the grid cells it covers
+        origin_x, origin_y = tx * CACHE_TILE_SIZE, ty * CACHE_TILE_SIZE
+        first_x = origin_x // self.tile_size
+        first_y = origin_y // self.tile_size
+        last_x = min(self.grid_size, -(-(origin_x + CACHE_TILE_SIZE) // self.tile_size))
+        last_y = min(self.grid_size, -(-(origin_y + CACHE_TILE_SIZE) // self.tile_size))
+
+        # Look up the pixels of every covered cell at once and lay them out as one image
+        cells = self.grid[first_y:last_y, first_x:last_x]
+        ts = self.tile_size
+        rows, cols = cells.shape
+        pixels = self.atlas[cells].transpose(0, 2, 1, 3, 4).reshape(rows * ts, cols * ts, 4)
+
+        # Crop to the tile, cutting the cells that straddle its edges
+        offset_x, offset_y = origin_x - first_x * ts, origin_y - first_y * ts
+        pixels = pixels[offset_y:offset_y + CACHE_TILE_SIZE, offset_x:offset_x + CACHE_TILE_SIZE]
+
+        # Write straight into the image memory, past the map edge the tile stays transparent
+        image = QImage(CACHE_TILE_SIZE, CACHE_TILE_SIZE, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        bits = image.bits()
+        bits.setsize(image.sizeInBytes())
+        tile = np.frombuffer(bits, dtype=np.uint8).reshape(CACHE_TILE_SIZE, CACHE_TILE_SIZE, 4)
+        tile[:pixels.shape[0], :pixels.shape[1]] = pixels
+
+        return QPixmap.fromImage(image)
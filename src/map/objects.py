@@ -1,16 +1,59 @@
 """
 Interactive map objects like trees and rocks
 """
-from PyQt6.QtWidgets import QGraphicsItem
-from PyQt6.QtCore import QRectF, Qt, QRect
-from PyQt6.QtGui import QPixmap, QBrush
+import weakref
+from PyQt6.QtWidgets import QGraphicsItem, QGraphicsPixmapItem, QGraphicsRectItem
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPixmap, QBrush, QPen, QPainter
 from src.config import OBJECT_STATS
 
-class InteractionItem(QGraphicsItem):
+# Shared painter state, built once instead of per object
+_SELECTION_PEN = QPen(Qt.PenStyle.DashLine)
+_NO_BRUSH = QBrush()
+
+# Sprites scaled to their on-map size, shared by every object with the same texture and size
+_sprite_cache = {}
+
+
+def _scaled_sprite(pixmap, size):
+    """Return the pixmap scaled to size x size, scaling it only once"""
+    key = (pixmap.cacheKey(), size)
+    sprite = _sprite_cache.get(key)
+    if sprite is None:
+        sprite = pixmap.scaled(
+            size, size,
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.FastTransformation
+        )
+        _sprite_cache[key] = sprite
+    return sprite
+
+
+def _brush_sprite(brush, size):
+    """Paint a plain size x size square with the brush, for objects without a pixmap"""
+    sprite = QPixmap(size, size)
+    sprite.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(sprite)
+    painter.fillRect(0, 0, size, size, brush)
+    painter.end()
+    return sprite
+
+
+class InteractionItem(QGraphicsPixmapItem):
     """Base class for interactive map objects"""
-    def __init__(self, x, y, size, texture, parent=None):
+    # Stats shared by every instance of a subclass, set from OBJECT_STATS
+    STATS = {}
+    MOVEMENT_COST = 0
+    DEFENSE_BONUS = 0
+    ATTACK_PENALTY = 0
+
+    def __init__(self, x, y, size, texture, owner=None, parent=None):
         super(InteractionItem, self).__init__(parent)
 
+        # Map generator tracking this object, told when it is removed
+        # Held weakly, since the generator holds the objects in turn
+        self.owner = weakref.ref(owner) if owner is not None else None
+
         self.x = x
         self.y = y
         self.size = size
@@ -21,41 +64,34 @@ class InteractionItem(QGraphicsItem):
         # Enable selection for interaction
         self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIsSelectable, True)
 
-    def boundingRect(self):
-        return QRectF(0, 0, self.size, self.size)
+        # Leave small margin around the edges (10%), wider for the plain brush fallback
+        margin = int(size * (0.1 if self.is_pixmap else 0.15))
+        body_size = size - 2 * margin
 
-    def paint(self, painter, option, widget):
-        # Different drawing method based on texture type
+        # Qt draws the pre-scaled sprite natively, no Python paint() involved
         if self.is_pixmap:
-            # Calculate the scaled size to fit within the tile
-            # Leave small margin around the edges (10%)
-            margin = self.size * 0.1
-            draw_size = self.size - 2 * margin
-
-            # Draw the pixmap scaled to fit within the tile
-            painter.drawPixmap(
-                QRect(int(margin), int(margin), int(draw_size), int(draw_size)),
-                self.texture
-            )
-
-            # Highlight selection if needed
-            if self.isSelected():
-                painter.setPen(Qt.PenStyle.DashLine)
-                painter.setBrush(QBrush())  # No fill
-                painter.drawRect(margin, margin, draw_size, draw_size)
+            self.setPixmap(_scaled_sprite(texture, body_size))
         else:
-            # For brush textures (fallback)
-            painter.setBrush(self.texture)
-            painter.setPen(Qt.PenStyle.NoPen)
-
-            # Draw with margin for better visibility
-            margin = self.size * 0.15
-            painter.drawRect(margin, margin, self.size - 2 * margin, self.size - 2 * margin)
-
-            # Highlight if selected
-            if self.isSelected():
-                painter.setPen(Qt.PenStyle.DashLine)
-                painter.drawRect(margin, margin, self.size - 2 * margin, self.size - 2 * margin)
+            self.setPixmap(_brush_sprite(texture, body_size))
+        self.setOffset(margin, margin)
+
+        # Hit-test against the sprite rect instead of building an alpha mask
+        self.setShapeMode(QGraphicsPixmapItem.ShapeMode.BoundingRectShape)
+
+        # Dashed selection outline, created the first time the object is selected
+        self.highlight = None
+
+    def itemChange(self, change, value):
+        """Toggle the selection outline with the selection state"""
+        if change == QGraphicsItem.GraphicsItemChange.ItemSelectedHasChanged:
+            if self.highlight is None:
+                self.highlight = QGraphicsRectItem(self.offset().x(), self.offset().y(),
+                                                   self.pixmap().width(), self.pixmap().height(), self)
+                self.highlight.setPen(_SELECTION_PEN)
+                self.highlight.setBrush(_NO_BRUSH)
+                self.highlight.setAcceptedMouseButtons(Qt.MouseButton.NoButton)
+            self.highlight.setVisible(bool(value))
+        return super().itemChange(change, value)
 
     def remove(self):
         """Remove this item from the scene"""
@@ -67,25 +103,19 @@ class InteractionItem(QGraphicsItem):
             # Remove from scene
             self.scene().removeItem(self)
 
-            # Try to notify the main window about the removal
-            main_window = None
-
-            # Look for the main window through scene views
-            if self.scene() and self.scene().views():
-                view = self.scene().views()[0]
-                main_window = view.window()
-
-            # If we found the main window and it has a map_objects dictionary
-            if main_window and hasattr(main_window, 'map_objects'):
-                # Remove from the tracking dictionary if it exists
-                if (grid_x, grid_y) in main_window.map_objects:
-                    del main_window.map_objects[(grid_x, grid_y)]
+            # Let the owning map generator stop tracking the object
+            owner = self.owner() if self.owner is not None else None
+            if owner is not None:
+                if owner.remove_object(grid_x, grid_y) is not None:
                     print(f"Removed object at ({grid_x}, {grid_y})")
 
             return True
 
         return False
 
+    def get_stats(self):
+        return self.STATS
+
     def mousePressEvent(self, event):
         """Handle mouse press events on this item"""
         super().mousePressEvent(event)
@@ -100,27 +130,31 @@ class InteractionItem(QGraphicsItem):
 
 class Tree(InteractionItem):
     """Tree object - blocks movement, provides defense"""
-    def __init__(self, x, y, size, texture_manager):
+    STATS = OBJECT_STATS["tree"]
+    MOVEMENT_COST = STATS["movement_cost"]
+    DEFENSE_BONUS = STATS["defense_bonus"]
+    ATTACK_PENALTY = STATS["attack_penalty"]
+
+    def __init__(self, x, y, size, texture_manager, owner=None):
         # Use tree pixmap if available, otherwise fallback to brush
         texture = texture_manager.get('tree_pixmap', texture_manager.get('tree'))
-        super().__init__(x, y, size, texture)
+        super().__init__(x, y, size, texture, owner)
 
         # Set Z value to ensure trees appear above terrain
         self.setZValue(1)
 
-    def get_stats(self):
-        return OBJECT_STATS["tree"]
-
 
 class Rock(InteractionItem):
     """Rock object - slows movement, provides defense"""
-    def __init__(self, x, y, size, texture_manager):
+    STATS = OBJECT_STATS["rock"]
+    MOVEMENT_COST = STATS["movement_cost"]
+    DEFENSE_BONUS = STATS["defense_bonus"]
+    ATTACK_PENALTY = STATS["attack_penalty"]
+
+    def __init__(self, x, y, size, texture_manager, owner=None):
         # Use rock pixmap if available, otherwise fallback to brush
         texture = texture_manager.get('rock_pixmap', texture_manager.get('rock'))
-        super().__init__(x, y, size, texture)
+        super().__init__(x, y, size, texture, owner)
 
         # Set Z value to ensure rocks appear above terrain
         self.setZValue(1)
-
-    def get_stats(self):
-        return OBJECT_STATS["rock"]
\ No newline at end of file
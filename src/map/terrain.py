@@ -1,47 +1,24 @@
 """
-Terrain tile classes for the game map
+Terrain types for the game map
 """
-from PyQt6.QtWidgets import QGraphicsItem
-from PyQt6.QtCore import QRectF, Qt
+import numpy as np
 from src.config import TERRAIN_STATS
 
-class TerrainTile(QGraphicsItem):
-    """Base class for all terrain tiles"""
-    def __init__(self, x, y, size, texture, parent=None):
-        super(TerrainTile, self).__init__(parent)
+# Terrain type codes stored in the map grid
+WATER = 0
+GRASS = 1
+SAND = 2
 
-        self.x = x
-        self.y = y
-        self.size = size
-        self.texture = texture
-        self.setPos(x * size, y * size)
+# Terrain names indexed by type code (keys into TERRAIN_STATS and the textures)
+TERRAIN_NAMES = ("water", "grass", "sand")
 
-    def boundingRect(self):
-        return QRectF(0, 0, self.size, self.size)
+# Stat lookup tables indexed by type code, e.g. MOVEMENT_COST[grid] for the whole map
+MOVEMENT_COST = np.array([TERRAIN_STATS[name]["movement_cost"] for name in TERRAIN_NAMES], dtype=np.int16)
+DEFENSE_BONUS = np.array([TERRAIN_STATS[name]["defense_bonus"] for name in TERRAIN_NAMES], dtype=np.int16)
+ATTACK_PENALTY = np.array([TERRAIN_STATS[name]["attack_penalty"] for name in TERRAIN_NAMES], dtype=np.int16)
 
-    def paint(self, painter, option, widget):
-        # Draw the terrain with the texture
-        painter.setBrush(self.texture)
-        painter.setPen(Qt.PenStyle.NoPen)  # No outline
-        painter.drawRect(0, 0, self.size, self.size)
 
-    def get_stats(self):
-        return {}
+def get_stats(terrain):
+    """Return the stats for a terrain type code"""
+    return TERRAIN_STATS[TERRAIN_NAMES[terrain]]
 
-
-class WaterTile(TerrainTile):
-    """Water terrain - impassable"""
-    def get_stats(self):
-        return TERRAIN_STATS["water"]
-
-
-class GrassTile(TerrainTile):
-    """Grass terrain - normal movement"""
-    def get_stats(self):
-        return TERRAIN_STATS["grass"]
-
-
-class SandTile(TerrainTile):
-    """Sand terrain - slow movement"""
-    def get_stats(self):
-        return TERRAIN_STATS["sand"]
\ No newline at end of file
@@ -5,6 +5,10 @@ from PyQt6.QtWidgets import QGraphicsItem
 from PyQt6.QtGui import QPixmap, QPainter
 from PyQt6.QtCore import Qt, QRectF, QTimer
 
+# Sprite sheet rows, in order, and the index of each direction in Player.frames
+DIRECTIONS = ("down", "left", "right", "up")
+DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+
 
 class Player(QGraphicsItem):
     """Player character that can move around the map"""
@@ -14,15 +18,16 @@ class Player(QGraphicsItem):
 
         # Player properties
         self.tile_size = tile_size
+        self.bounds = QRectF(0, 0, tile_size, tile_size)  # Built once, Qt asks for it on every paint and hit test
         self.speed = 5  # pixels per movement
         self.direction = "down"  # Default direction
+        self.direction_index = DIRECTION_INDEX[self.direction]
 
         # Animation properties
         self.frame_index = 0
-        self.frames = {}
+        self.frames = ()  # One tuple of frames per direction, indexed by direction_index
         self.animation_timer = QTimer()
-        self.animation_timer.timeout.connect(self.update_animation)
-        self.animation_timer.start(150)  # Update frame every 150ms
+        self.animation_timer.timeout.connect(self.update_animation)  # Started by move(), stopped by stop()
 
         # Load sprite sheet
         self.load_sprite_sheet(sprite_sheet_path)
@@ -30,6 +35,9 @@ class Player(QGraphicsItem):
         # Set initial position
         self.setZValue(10)  # Make sure player is above terrain
 
+        # Rasterize the current frame once, update() re-renders it when the frame changes
+        self.setCacheMode(QGraphicsItem.CacheMode.DeviceCoordinateCache)
+
     def load_sprite_sheet(self, path):
         """Load and split sprite sheet into individual frames"""
         try:
@@ -44,22 +52,24 @@ class Player(QGraphicsItem):
             frame_width = 32  # Example - adjust to your sprite sheet
             frame_height = 32  # Example - adjust to your sprite sheet
 
-            # Set directions and frames
-            directions = ["down", "left", "right", "up"]
+            # Set frames per direction
             frames_per_direction = 4
 
-            # Extract frames for each direction
-            for i, direction in enumerate(directions):
-                self.frames[direction] = []
-                row = i
+            # Extract frames for each direction, one sprite sheet row each
+            frames = []
+            for row in range(len(DIRECTIONS)):
+                direction_frames = []
 
                 for col in range(frames_per_direction):
                     x = col * frame_width
                     y = row * frame_height
                     frame = sprite_sheet.copy(x, y, frame_width, frame_height)
-                    self.frames[direction].append(frame)
+                    direction_frames.append(self._scale_frame(frame))
+
+                frames.append(tuple(direction_frames))
+            self.frames = tuple(frames)
 
-            print(f"Successfully loaded player sprite sheet with {len(directions)} directions")
+            print(f"Successfully loaded player sprite sheet with {len(DIRECTIONS)} directions")
 
         except Exception as e:
             print(f"Error loading sprite sheet: {e}")
@@ -67,13 +77,13 @@ class Player(QGraphicsItem):
 
     def create_fallback_sprite(self):
         """Create a simple fallback sprite if loading fails"""
-        # Create simple colored squares for each direction
-        self.frames = {
-            "down": [self._create_colored_sprite(Qt.GlobalColor.blue)],
-            "left": [self._create_colored_sprite(Qt.GlobalColor.green)],
-            "right": [self._create_colored_sprite(Qt.GlobalColor.yellow)],
-            "up": [self._create_colored_sprite(Qt.GlobalColor.red)]
-        }
+        # Create simple colored squares for each direction, in DIRECTIONS order
+        self.frames = (
+            (self._create_colored_sprite(Qt.GlobalColor.blue),),
+            (self._create_colored_sprite(Qt.GlobalColor.green),),
+            (self._create_colored_sprite(Qt.GlobalColor.yellow),),
+            (self._create_colored_sprite(Qt.GlobalColor.red),)
+        )
         print("Created fallback sprites")
 
     def _create_colored_sprite(self, color):
@@ -85,35 +95,36 @@ class Player(QGraphicsItem):
         painter.setPen(Qt.PenStyle.NoPen)
         painter.drawRect(2, 2, 28, 28)  # Smaller than full size to see the edges
         painter.end()
-        return pixmap
+        return self._scale_frame(pixmap)
+
+    def _scale_frame(self, frame):
+        """Scale a frame to the tile size once, so painting it needs no scaling"""
+        return frame.scaled(
+            self.tile_size, self.tile_size,
+            Qt.AspectRatioMode.IgnoreAspectRatio,
+            Qt.TransformationMode.FastTransformation
+        )
 
     def update_animation(self):
         """Update the current animation frame"""
-        if self.direction in self.frames:
-            frames_count = len(self.frames[self.direction])
-            if frames_count > 0:
-                self.frame_index = (self.frame_index + 1) % frames_count
-                self.update()  # Trigger redraw
+        frames_count = len(self.frames[self.direction_index])
+        if frames_count > 1:
+            self.frame_index = (self.frame_index + 1) % frames_count
+            self.update()  # Trigger redraw
 
     def boundingRect(self):
         """Return the bounding rectangle of the player"""
-        return QRectF(0, 0, self.tile_size, self.tile_size)
+        return self.bounds
 
     def paint(self, painter, option, widget):
         """Paint the current frame of the player"""
-        if self.direction in self.frames and len(self.frames[self.direction]) > 0:
-            # Get current frame
-            current_frame = self.frames[self.direction][self.frame_index]
-
-            # Draw the frame scaled to tile size
-            painter.drawPixmap(
-                0, 0, self.tile_size, self.tile_size,
-                current_frame
-            )
+        # Draw the current frame, already scaled to tile size
+        painter.drawPixmap(0, 0, self.frames[self.direction_index][self.frame_index])
 
     def move(self, direction):
         """Move the player in the specified direction"""
         self.direction = direction
+        self.direction_index = DIRECTION_INDEX[direction]
 
         # Calculate new position based on direction
         if direction == "up":
@@ -127,4 +138,11 @@ class Player(QGraphicsItem):
 
         # Start animation if it's not already running
         if not self.animation_timer.isActive():
-            self.animation_timer.start(150)
\ No newline at end of file
+            self.animation_timer.start(150)
+
+    def stop(self):
+        """Stop the walking animation and go back to the standing frame"""
+        self.animation_timer.stop()
+        if self.frame_index != 0:
+            self.frame_index = 0
+            self.update()
@@ -4,15 +4,20 @@ Main window for the Army Defense game
 import os
 import math
 
+import numpy as np
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QGraphicsScene, QGraphicsView,
     QFrame, QVBoxLayout, QWidget, QMessageBox
 )
-from PyQt6.QtGui import QBrush, QColor, QPixmap
-from PyQt6.QtCore import Qt, QEvent, QPoint, QRect
+from PyQt6.QtGui import QBrush, QColor, QPixmap, QPainter, QTransform
+from PyQt6.QtOpenGLWidgets import QOpenGLWidget
+from PyQt6.QtCore import Qt, QEvent, QPoint, QPointF, QRect, QTimer
 
 from src.map.map_generator import MapGenerator
-from src.config import TILESET_PATH, WATER_TILE_PATH, TREE_PATH, ROCK_PATH, AVATAR_PATH
+from src.map.map_scene import MapScene
+from src.map.terrain import GRASS
+from src.config import TILESET_PATH, WATER_TILE_PATH, TREE_PATH, ROCK_PATH, AVATAR_PATH, ZOOM_STEP, ZOOM_INTERVAL_MS
 from src.ui.bottom_panel import BottomPanel
 from src.player import Player
 
@@ -23,6 +28,7 @@ class MyWindow(QMainWindow):
     def __init__(self):
         super(MyWindow, self).__init__()
         self.setWindowTitle("Army Defense")
+        self.player = None  # Created by add_player once the map exists
         self.initScreen()
         self.initGameBoard()
         self.connectUIEvents()
@@ -72,15 +78,12 @@ class MyWindow(QMainWindow):
         center_x, center_y = self.grid_size // 2, self.grid_size // 2
         search_radius = 5
 
-        for y in range(center_y - search_radius, center_y + search_radius):
-            for x in range(center_x - search_radius, center_x + search_radius):
-                if 0 <= x < self.grid_size and 0 <= y < self.grid_size:
-                    from src.map.terrain import GrassTile
-                    if isinstance(self.grid[y][x], GrassTile):
-                        start_x, start_y = x, y
-                        break
-            if start_x is not None:
-                break
+        # First grass tile of the search window, in row order
+        min_y, min_x = max(0, center_y - search_radius), max(0, center_x - search_radius)
+        window = self.grid[min_y:center_y + search_radius, min_x:center_x + search_radius]
+        grass_tiles = np.argwhere(window == GRASS)
+        if len(grass_tiles):
+            start_y, start_x = (grass_tiles[0] + (min_y, min_x)).tolist()
 
         # If no grass tile found, use center
         if start_x is None:
@@ -101,10 +104,29 @@ class MyWindow(QMainWindow):
     def initGameBoard(self):
         """Initialize the game board with scene, view, and map"""
         # Setup scene and view
-        self.scene = QGraphicsScene(self)
+        self.scene = MapScene(self)
+
+        # Terrain is drawn as the background, leaving only a few hundred objects
+        # and the moving player as items, so a linear scan beats a BSP index
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.view = QGraphicsView(self.scene, self)
         self.view.setFrameShape(QFrame.Shape.NoFrame)
 
+        # Render through OpenGL so tile and sprite blits run on the GPU
+        self.view.setViewport(QOpenGLWidget())
+
+        # OpenGL viewports are always repainted in full
+        self.view.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+
+        # Everything is axis-aligned tiles and sprites, antialiasing only adds cost
+        self.view.setRenderHint(QPainter.RenderHint.Antialiasing, False)
+
+        # Items set their own pen/brush, so skip the per-item painter save/restore
+        self.view.setOptimizationFlags(
+            QGraphicsView.OptimizationFlag.DontSavePainterState |
+            QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing
+        )
+
         # Add view to layout
         self.main_layout.addWidget(self.view, 1)
 
@@ -116,17 +138,38 @@ class MyWindow(QMainWindow):
         self.is_middle_pressed = False
         self.last_pos = None
 
+        # Wheel zoom is coalesced and applied once per frame (~60 Hz)
+        self.pending_zoom = 1.0
+        self.zoom_anchor = None
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.setInterval(ZOOM_INTERVAL_MS)
+        self.zoom_timer.timeout.connect(self.applyZoom)
+
+        # Drag deltas are accumulated and applied once per event loop turn
+        self.pending_dx = 0
+        self.pending_dy = 0
+        self.pan_timer = QTimer(self)
+        self.pan_timer.setSingleShot(True)
+        self.pan_timer.setInterval(0)
+        self.pan_timer.timeout.connect(self.applyPan)
+
         # Load textures and generate map
         self.loadTilesetTextures()
 
         self.grid_size = 60
         self.tile_size = min(self.width(), self.height()) // self.grid_size
+        self.rescaleTextures()
 
         # Create map generator
         self.map_generator = MapGenerator(self.scene, self.textures, self.grid_size)
 
-        # Generate the map
-        map_width, map_height = self.map_generator.generate_map(self.tile_size)
+        # Generate the map without repainting the view for every change
+        self.view.setUpdatesEnabled(False)
+        try:
+            map_width, map_height = self.map_generator.generate_map(self.tile_size)
+        finally:
+            self.view.setUpdatesEnabled(True)
 
         # Get references to the grid and map objects
         self.grid = self.map_generator.get_grid()
@@ -137,15 +180,22 @@ class MyWindow(QMainWindow):
 
         # Set scene boundaries
         self.scene.setSceneRect(0, 0, map_width, map_height)
+        self.scene_rect = self.scene.sceneRect()  # Fixed for the lifetime of the map
+
+        # Repaint once with the finished map
+        self.view.viewport().update()
 
         # Set initial view
-        self.view.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
-        self.initial_transform = self.view.transform()
+        self.fitMap()
 
         # Hide scrollbars
         self.view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.view.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
 
+        # Keep the scrollbars at hand for panning
+        self.hbar = self.view.horizontalScrollBar()
+        self.vbar = self.view.verticalScrollBar()
+
         # Create simple bottom panel
         self.bottom_panel = BottomPanel(self)
 
@@ -162,6 +212,7 @@ class MyWindow(QMainWindow):
     def loadTilesetTextures(self):
         """Load textures for terrain and objects"""
         self.textures = {}
+        self.terrain_sources = {}
 
         # Update paths to the new asset structure
         tileset_path = TILESET_PATH
@@ -185,15 +236,10 @@ class MyWindow(QMainWindow):
             print("Error while loading water tileset")
             return
 
-        # Extract terrain textures
-        meadow_tile = tileset.copy(QRect(0, 0, 16, 16))
-        self.textures['grass'] = QBrush(meadow_tile)
-
-        ocean_tile = water_tile.copy(QRect(0, 0, 16, 16))
-        self.textures['water'] = QBrush(ocean_tile)
-
-        sand_tile = tileset.copy(QRect(144, 32, 16, 16))
-        self.textures['sand'] = QBrush(sand_tile)
+        # Extract terrain textures (turned into brushes once the tile size is known)
+        self.terrain_sources['grass'] = tileset.copy(QRect(0, 0, 16, 16))
+        self.terrain_sources['water'] = water_tile.copy(QRect(0, 0, 16, 16))
+        self.terrain_sources['sand'] = tileset.copy(QRect(144, 32, 16, 16))
 
         # Load object pixmaps directly (not as brushes)
         if os.path.exists(tree_path):
@@ -230,99 +276,128 @@ class MyWindow(QMainWindow):
 
         print("Successfully loaded textures!")
 
+    def rescaleTextures(self):
+        """Scale the terrain textures to exactly one tile so painting never rescales them"""
+        for name, source in self.terrain_sources.items():
+            # Nearest-neighbour scaling keeps the pixel art crisp
+            tile_pixmap = source.scaled(
+                self.tile_size, self.tile_size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.FastTransformation
+            )
+            self.textures[name] = QBrush(tile_pixmap)
+
     def eventFilter(self, source, event):
         """Handle mouse events for map interaction"""
         if source is self.view.viewport():
+            event_type = event.type()
+
+            # Hover moves only matter while panning, pass them on right away
+            if event_type == QEvent.Type.MouseMove and not self.is_middle_pressed:
+                return False
+
+            # Refit the map once the viewport has its new size, e.g. after the window is laid out or resized
+            if event_type == QEvent.Type.Resize:
+                self.fitMap()
+                return False
+
             # Handle mouse wheel events for zooming
-            if event.type() == QEvent.Type.Wheel:
-                # Get the mouse position
-                mouse_pos = self.view.mapToScene(event.position().toPoint())
+            if event_type == QEvent.Type.Wheel:
+                # Zoom around the latest mouse position
+                self.zoom_anchor = self.view.mapToScene(event.position().toPoint())
 
-                # Only handle zoom in (positive scroll)
+                # Fold this step into the pending zoom, applied at most once per frame
                 if event.angleDelta().y() > 0:
-                    # Zoom in
-                    scale_factor = 1.15  # 15% scale per scroll step
-                    self.view.scale(scale_factor, scale_factor)
-
-                    # Center view on mouse position
-                    self.view.centerOn(mouse_pos)
+                    self.pending_zoom *= ZOOM_STEP
                 else:
-                    # For zoom out, check if we're at or below initial scale
-                    current_scale = self.view.transform().m11()  # Get current horizontal scale
-                    initial_scale = self.initial_transform.m11()  # Get initial horizontal scale
-
-                    if current_scale > initial_scale:
-                        # Only zoom out if we're still more zoomed in than the start
-                        scale_factor = 1.15
-                        self.view.scale(1 / scale_factor, 1 / scale_factor)
-                        self.view.centerOn(mouse_pos)
-                    else:
-                        # Reset to initial transform (showing full map)
-                        self.view.setTransform(self.initial_transform)
-
-                # Set the scroll limits after zooming
-                self.limitScroll()
+                    self.pending_zoom /= ZOOM_STEP
+
+                if not self.zoom_timer.isActive():
+                    self.zoom_timer.start()
                 return True  # Event handled
 
             # Handle middle mouse button press
-            elif event.type() == QEvent.Type.MouseButtonPress and event.button() == Qt.MouseButton.MiddleButton:
+            elif event_type == QEvent.Type.MouseButtonPress and event.button() == Qt.MouseButton.MiddleButton:
                 self.is_middle_pressed = True
                 self.last_pos = event.position().toPoint()
                 return True
 
             # Handle middle mouse button release
-            elif event.type() == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.MiddleButton:
+            elif event_type == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.MiddleButton:
                 self.is_middle_pressed = False
                 self.last_pos = None
                 return True
 
             # Handle mouse movement for dragging
-            elif event.type() == QEvent.Type.MouseMove and self.is_middle_pressed and self.last_pos is not None:
+            elif event_type == QEvent.Type.MouseMove and self.is_middle_pressed and self.last_pos is not None:
                 # Get current position
                 current_pos = event.position().toPoint()
 
-                # Calculate difference
-                dx = current_pos.x() - self.last_pos.x()
-                dy = current_pos.y() - self.last_pos.y()
+                # Accumulate the difference until the pan is applied
+                self.pending_dx += current_pos.x() - self.last_pos.x()
+                self.pending_dy += current_pos.y() - self.last_pos.y()
 
                 # Store new position
                 self.last_pos = current_pos
 
-                # Move the view using scrollbars (the most reliable way)
-                self.view.horizontalScrollBar().setValue(
-                    self.view.horizontalScrollBar().value() - dx)
-                self.view.verticalScrollBar().setValue(
-                    self.view.verticalScrollBar().value() - dy)
+                if not self.pan_timer.isActive():
+                    self.pan_timer.start()
 
                 return True
 
         return super(MyWindow, self).eventFilter(source, event)
 
-    def limitScroll(self):
-        """Limit scrolling to keep the view within the scene boundaries"""
-        # Calculate the visible scene rect
-        visible_rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
-        scene_rect = self.scene.sceneRect()
-
-        # If visible rect is larger than scene, center the view
-        if visible_rect.width() <= scene_rect.width() and visible_rect.height() <= scene_rect.height():
-            # Calculate the bounds to keep the view within the scene
-            x = max(0, min(visible_rect.left(), scene_rect.right() - visible_rect.width()))
-            y = max(0, min(visible_rect.top(), scene_rect.bottom() - visible_rect.height()))
-
-            # Update the view position if needed
-            if x != visible_rect.left() or y != visible_rect.top():
-                self.view.centerOn(x + visible_rect.width() / 2, y + visible_rect.height() / 2)
+    def applyPan(self):
+        """Move the view by the drag distance accumulated since the last pan"""
+        # Move the view using scrollbars (the most reliable way)
+        self.hbar.setValue(self.hbar.value() - self.pending_dx)
+        self.vbar.setValue(self.vbar.value() - self.pending_dy)
+        self.pending_dx = 0
+        self.pending_dy = 0
+
+    def applyZoom(self):
+        """Apply the zoom accumulated from wheel events since the last frame"""
+        zoom = self.pending_zoom
+        self.pending_zoom = 1.0
+
+        if self.current_scale * zoom > self.initial_scale:
+            # Center view on mouse position
+            self.current_scale *= zoom
+            center = self.zoom_anchor
+        else:
+            # Never zoom out past the initial transform (showing full map)
+            self.current_scale = self.initial_scale
+            center = self.scene_rect.center()
+
+        # Apply the new zoom level with a single transform change
+        self.view.setTransform(QTransform.fromScale(self.current_scale, self.current_scale))
+
+        # Limit scrolling to keep the view within the scene boundaries, worked out from the new scale
+        viewport = self.view.viewport()
+        half_width = viewport.width() / self.current_scale / 2
+        half_height = viewport.height() / self.current_scale / 2
+        scene_rect = self.scene_rect
+
+        # Only clamp when the visible area fits inside the scene
+        if 2 * half_width <= scene_rect.width() and 2 * half_height <= scene_rect.height():
+            x = min(max(center.x(), scene_rect.left() + half_width), scene_rect.right() - half_width)
+            y = min(max(center.y(), scene_rect.top() + half_height), scene_rect.bottom() - half_height)
+            center = QPointF(x, y)
+
+        self.view.centerOn(center)
+
+    def fitMap(self):
+        """Fit the whole map in the view, which is also the furthest the view can zoom out"""
+        self.view.fitInView(self.scene_rect, Qt.AspectRatioMode.KeepAspectRatio)
+        self.initial_transform = self.view.transform()
 
-    def resizeEvent(self, event):
-        """Handle window resize events"""
-        super().resizeEvent(event)
-        # Adjust the view to fit the scene when resized
-        self.view.fitInView(self.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+        # Track the zoom level as plain floats instead of reading it back from the view
+        self.initial_scale = self.initial_transform.m11()
+        self.current_scale = self.initial_scale
 
     def keyPressEvent(self, event):
         """Handle keyboard input for player movement"""
-        if not hasattr(self, 'player'):
+        if self.player is None:
             return
 
         if event.key() == Qt.Key.Key_W:
@@ -338,4 +413,12 @@ class MyWindow(QMainWindow):
         self.view.ensureVisible(self.player)
 
         # Make sure we call the parent class implementation
-        super().keyPressEvent(event)
\ No newline at end of file
+        super().keyPressEvent(event)
+
+    def keyReleaseEvent(self, event):
+        """Stop the player animation once a movement key is let go"""
+        if self.player is not None and not event.isAutoRepeat():
+            if event.key() in (Qt.Key.Key_W, Qt.Key.Key_S, Qt.Key.Key_A, Qt.Key.Key_D):
+                self.player.stop()
+
+        super().keyReleaseEvent(event)
\ No newline at end of file